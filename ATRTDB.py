@@ -5,13 +5,28 @@ For Raspberry Pi Display Systems
 By Doc Brown's Temporal Transit Laboratory
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
 from google.transit import gtfs_realtime_pb2
+from google.protobuf.internal import api_implementation
 from datetime import datetime, timedelta
 import time
+import argparse
 import os
+import sys
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 from enum import Enum
+import heapq
+from operator import itemgetter
 import random  # For simulation mode
+try:
+    import orjson  # Optional: faster parsing of the stop catalog response
+except ImportError:
+    orjson = None
 
 # ============================================================================
 # CONFIGURATION - CRITICAL! SET YOUR API KEY!
@@ -25,6 +40,12 @@ REALTIME_URL = 'https://api.at.govt.nz/v2/public/realtime/tripupdates'
 ROTATION_SECONDS = 45  # Time to show each board before rotating
 MAX_DEPARTURES = 10  # Maximum departures to show per board
 REFRESH_INTERVAL = 30  # Seconds between API updates
+# Above this many route prefixes, match by length-bucketed set lookups instead of
+# a linear tuple startswith (measured crossover is roughly 30-40 prefixes)
+PREFIX_BUCKET_THRESHOLD = 48
+# Stop lookup cache - the stop catalog rarely changes, so skip the lookup on restarts
+STOP_CACHE_FILE = os.path.expanduser('~/.cache/atrtdb/stops.json')
+STOP_CACHE_TTL = 24 * 60 * 60  # Seconds before re-checking with the API
 # ANSI colors for punk vibe
 COLOR_GREEN = '\033[92m'
 COLOR_RED = '\033[91m'
@@ -37,6 +58,10 @@ class TransitMode(Enum):
     TRAIN = "train"
     BUS = "bus"
     FERRY = "ferry"
+def bucket_prefixes(prefixes: List[str]) -> tuple:
+    """Group prefixes by length: ((3, {'64-', ...}), (4, {'295-', ...}), ...)"""
+    lengths = sorted({len(p) for p in prefixes})
+    return tuple((n, frozenset(p for p in prefixes if len(p) == n)) for n in lengths)
 class Location:
     """Configuration for each departure board location"""
     def __init__(self, name: str, search_term: str, mode: TransitMode,
@@ -45,7 +70,12 @@ class Location:
         self.search_term = search_term
         self.mode = mode
         self.route_prefixes = route_prefixes or []
+        self.route_prefix_tuple = tuple(self.route_prefixes)  # str.startswith takes a tuple
+        # Large prefix lists: one slice + set lookup per distinct length, whatever the count
+        self.route_prefix_buckets = (bucket_prefixes(self.route_prefixes)
+                                     if len(self.route_prefixes) > PREFIX_BUCKET_THRESHOLD else ())
         self.stop_ids = []
+        self.stop_ids_set = frozenset()  # O(1) membership for the departure scan
 # Define your three locations
 LOCATIONS = [
     Location(
@@ -79,22 +109,76 @@ HEADERS = {
 }
 PB_HEADERS = {
     'Ocp-Apim-Subscription-Key': API_KEY,
-    'Accept': 'application/x-google-protobuf'
+    'Accept': 'application/x-google-protobuf',
+    # The protobuf feed compresses 3-5x. Advertise every codec urllib3 can
+    # decode - gzip/deflate always, br once the optional brotli package is installed
+    'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding']
 }
+def make_session(headers: Dict[str, str]) -> requests.Session:
+    """Build a keep-alive session so each poll reuses its TLS connection"""
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4,
+                          max_retries=Retry(total=2, backoff_factor=0.3))
+    session.mount('https://', adapter)
+    return session
+SESSION = make_session(HEADERS)
+PB_SESSION = make_session(PB_HEADERS)
+_STOP_CACHE_LOCK = threading.Lock()  # find_stop_ids runs on a thread pool at startup
+def _load_stop_cache() -> Dict:
+    """Read the on-disk stop cache, keyed by search term; empty if missing or corrupt"""
+    try:
+        with open(STOP_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+def _valid_stop_cache_entry(entry) -> bool:
+    """True if a cache entry has the shape find_stop_ids writes"""
+    return (isinstance(entry, dict)
+            and isinstance(entry.get('ts'), (int, float)) and not isinstance(entry['ts'], bool)
+            and isinstance(entry.get('stop_ids'), list))
+def _save_stop_cache_entry(search_term: str, entry: Dict):
+    """Store one search result in the on-disk stop cache"""
+    with _STOP_CACHE_LOCK:
+        cache = _load_stop_cache()
+        cache[search_term] = entry
+        try:
+            os.makedirs(os.path.dirname(STOP_CACHE_FILE), exist_ok=True)
+            tmp_file = STOP_CACHE_FILE + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(cache, f)
+            os.replace(tmp_file, STOP_CACHE_FILE)
+        except OSError as e:
+            print(f"⚠️ Could not write stop cache: {e}")
 def find_stop_ids(location: Location) -> List[str]:
     """Find all stop IDs for a given location"""
     if SIMULATION_MODE:
         print(f"🎭 Simulation: Mocking 3 stops for {location.name}")
         return [f"mock_{i}" for i in range(3)]
     
+    cached = _load_stop_cache().get(location.search_term)
+    if not _valid_stop_cache_entry(cached):
+        cached = None  # Hand-edited or stale-format entry - treat as a miss
+    if cached and time.time() - cached['ts'] < STOP_CACHE_TTL:
+        print(f"✓ Using cached stops for {location.name}")
+        return cached['stop_ids']
+    
     params = {'search': location.search_term}
+    # Let the server answer 304 if the catalog hasn't changed since our copy
+    headers = {}
+    if cached and isinstance(cached.get('last_modified'), str):
+        headers['If-Modified-Since'] = cached['last_modified']
     try:
-        resp = requests.get(GTFS_BASE, headers=HEADERS, params=params, timeout=10)
+        resp = SESSION.get(GTFS_BASE, params=params, headers=headers, timeout=10)
+        if resp.status_code == 304 and cached:
+            _save_stop_cache_entry(location.search_term, dict(cached, ts=time.time()))
+            return cached['stop_ids']
         if resp.status_code != 200:
             print(f"⚠️ Stop lookup failed for {location.name}: {resp.status_code}")
             return []
         
-        data = resp.json()
+        data = orjson.loads(resp.content) if orjson is not None else resp.json()
         stop_ids = []
         if 'data' in data:
             for item in data['data']:
@@ -104,12 +188,87 @@ def find_stop_ids(location: Location) -> List[str]:
                     stop_ids.append(item['id'])
                     print(f"✓ Found: {attrs.get('stop_name')} (ID: {item['id']})")
         
+        if stop_ids:
+            _save_stop_cache_entry(location.search_term, {
+                'stop_ids': stop_ids,
+                'ts': time.time(),
+                'last_modified': resp.headers.get('Last-Modified')
+            })
         return stop_ids
     except Exception as e:
         print(f"❌ Error finding stops for {location.name}: {e}")
         return []
-def get_departures(location: Location) -> List[Dict]:
-    """Fetch real-time departures for a location"""
+# Optional Cython decoder for the feed - build with: cythonize -i _fast_gtfs.pyx
+try:
+    from _fast_gtfs import parse_tripupdates
+except ImportError:
+    parse_tripupdates = None
+def _extract_trip_updates(feed) -> List[tuple]:
+    """Flatten a parsed FeedMessage into the same tuples _fast_gtfs produces"""
+    trip_updates = []
+    for entity in feed.entity:
+        if entity.HasField('trip_update'):
+            tu = entity.trip_update
+            stops = [(stu.stop_id, stu.departure.time, stu.departure.delay)
+                     for stu in tu.stop_time_update if stu.HasField('departure')]
+            # Headsign lives on TripProperties; TripDescriptor has no such field
+            trip_updates.append((tu.trip.route_id, tu.trip_properties.trip_headsign, stops))
+    return trip_updates
+# The realtime feed is global - one download serves every location
+_FEED_CACHE = {'ts': 0, 'trip_updates': None, 'encoding_checked': False}
+_FEED = gtfs_realtime_pb2.FeedMessage()  # Reused every refresh (single-threaded main loop)
+_FEED_BUF = bytearray()  # Reused download buffer for uncompressed feed bodies
+def _read_feed_body(resp: requests.Response):
+    """Read a streamed feed response, straight into _FEED_BUF when its size is known"""
+    length = resp.headers.get('Content-Length')
+    if not length or resp.headers.get('Content-Encoding'):
+        # Chunked or compressed - decoded size unknown up front, let requests assemble it
+        return resp.content
+    
+    size = int(length)
+    if len(_FEED_BUF) > size:
+        del _FEED_BUF[size:]
+    else:
+        _FEED_BUF.extend(bytes(size - len(_FEED_BUF)))
+    with memoryview(_FEED_BUF) as view:
+        got = 0
+        while got < size:
+            n = resp.raw.readinto(view[got:])
+            if not n:
+                raise IOError(f"realtime feed truncated at {got}/{size} bytes")
+            got += n
+    return _FEED_BUF
+def _get_trip_updates(force: bool = False):
+    """
+    Return the feed as (route_id, headsign, [(stop_id, dep_time, delay), ...])
+    tuples, downloading it at most once per REFRESH_INTERVAL unless forced
+    """
+    if (not force and _FEED_CACHE['trip_updates'] is not None
+            and time.time() - _FEED_CACHE['ts'] < REFRESH_INTERVAL):
+        return _FEED_CACHE['trip_updates']
+    
+    with PB_SESSION.get(REALTIME_URL, timeout=10, stream=True) as resp:
+        if resp.status_code != 200:
+            print(f"⚠️ Realtime feed failed: {resp.status_code}")
+            return None
+        if not _FEED_CACHE['encoding_checked']:
+            _FEED_CACHE['encoding_checked'] = True
+            if not resp.headers.get('Content-Encoding'):
+                print("⚠️ Realtime feed arrived uncompressed - downloads will be 3-5x larger")
+        body = _read_feed_body(resp)
+    
+    if parse_tripupdates is not None:
+        trip_updates = parse_tripupdates(body)
+    else:
+        # ParseFromString clears the message first; safe to reuse since
+        # _extract_trip_updates copies everything out into plain tuples
+        _FEED.ParseFromString(body)
+        trip_updates = _extract_trip_updates(_FEED)
+    _FEED_CACHE['ts'] = time.time()
+    _FEED_CACHE['trip_updates'] = trip_updates
+    return trip_updates
+def get_departures(location: Location, refresh: bool = False) -> List[Dict]:
+    """Fetch real-time departures for a location (refresh=True bypasses the feed cache)"""
     if SIMULATION_MODE:
         print(f"🎭 Simulating departures for {location.name}")
         now = datetime.now()
@@ -127,52 +286,44 @@ def get_departures(location: Location) -> List[Dict]:
         return mock_deps
     
     try:
-        resp = requests.get(REALTIME_URL, headers=PB_HEADERS, timeout=10)
-        if resp.status_code != 200:
-            print(f"⚠️ Realtime feed failed: {resp.status_code}")
+        trip_updates = _get_trip_updates(force=refresh)
+        if trip_updates is None:
             return []
         
-        feed = gtfs_realtime_pb2.FeedMessage()
-        feed.ParseFromString(resp.content)
+        now_ts = int(time.time())
+        candidates = []
+        stop_ids_set = location.stop_ids_set
+        prefixes = location.route_prefix_tuple
+        buckets = location.route_prefix_buckets
         
-        now = datetime.now()
-        deps = []
-        
-        for entity in feed.entity:
-            if entity.HasField('trip_update'):
-                trip = entity.trip_update.trip
-                route_id = trip.route_id
-                
-                # Filter by route prefixes if specified
-                if location.route_prefixes:
-                    if not any(route_id.startswith(p) for p in location.route_prefixes):
-                        continue
-                
-                for stu in entity.trip_update.stop_time_update:
-                    if stu.stop_id in location.stop_ids and stu.HasField('departure'):
-                        dep_time = datetime.fromtimestamp(stu.departure.time)
-                        
-                        # Only future departures
-                        if dep_time > now:
-                            delay = stu.departure.delay if stu.departure.HasField('delay') else 0
-                            headsign = trip.trip_headsign or 'N/A'
-                            
-                            # Calculate minutes until departure
-                            mins_until = int((dep_time - now).total_seconds() / 60)
-                            if mins_until < 0: mins_until = 0  # Safety
-                            
-                            deps.append({
-                                'route': route_id,
-                                'headsign': headsign,
-                                'time': dep_time,
-                                'mins_until': mins_until,
-                                'delay': delay,
-                                'stop_id': stu.stop_id
-                            })
+        for route_id, headsign, stops in trip_updates:
+            # Filter by route prefixes if specified
+            if buckets:
+                for n, group in buckets:
+                    if route_id[:n] in group:
+                        break
+                else:
+                    continue
+            elif prefixes and not route_id.startswith(prefixes):
+                continue
+            
+            for stop_id, dep_ts, delay in stops:
+                # Only future departures - keep cheap tuples, build dicts only for the rows shown
+                if stop_id in stop_ids_set and dep_ts > now_ts:
+                    candidates.append((dep_ts, route_id, headsign, stop_id, delay))
         
-        # Sort by departure time and limit results
-        deps.sort(key=lambda x: x['time'])
-        return deps[:MAX_DEPARTURES]
+        # Take the soonest departures - partial heap select instead of sorting every candidate
+        deps = []
+        for dep_ts, route_id, headsign, stop_id, delay in heapq.nsmallest(MAX_DEPARTURES, candidates, key=itemgetter(0)):
+            deps.append({
+                'route': route_id,
+                'headsign': headsign or 'N/A',
+                'time': datetime.fromtimestamp(dep_ts),
+                'mins_until': (dep_ts - now_ts) // 60,
+                'delay': delay,
+                'stop_id': stop_id
+            })
+        return deps
         
     except Exception as e:
         print(f"❌ Error fetching departures for {location.name}: {e}")
@@ -190,7 +341,21 @@ def get_mode_icon(mode: TransitMode) -> str:
     return icons.get(mode, "🚏")
 def clear_screen():
     """Clear terminal screen"""
-    os.system('clear' if os.name != 'nt' else 'cls')
+    if os.name == 'nt':
+        os.system('cls')
+        return
+    # Cursor home + erase display - no clear(1) subprocess per rotation
+    sys.stdout.write('\x1b[H\x1b[2J')
+    sys.stdout.flush()
+# Fixed render pieces, built once at import so each rotation only fills in the rows
+BORDER_TOP = "╔" + "═" * 78 + "╗"
+BORDER_MID = "╠" + "═" * 78 + "╣"
+BORDER_BOTTOM = "╚" + "═" * 78 + "╝"
+COLUMN_HEADER = "║ Route │ Destination │ Departs │ In │ Status ║"
+NO_DEPARTURES_ROW = "║" + " " * 25 + "No departures found" + " " * 34 + "║"
+# Precision in the spec truncates route/headsign, so rows need no slicing
+ROW_FMT = "║ {route:<7.7}│ {headsign:<22.22}│ {time_str:<8}│ {mins_str:<5}│ {marker} {status:<10} ║".format
+STATUS_ONTIME = f"{COLOR_GREEN}ON TIME{COLOR_RESET}"
 def render_console_board(location: Location, departures: List[Dict]):
     """Render departure board to console/terminal"""
     clear_screen()
@@ -199,32 +364,25 @@ def render_console_board(location: Location, departures: List[Dict]):
     icon = get_mode_icon(location.mode)
     current_time = datetime.now().strftime('%H:%M:%S')
     
-    print("╔" + "═" * 78 + "╗")
-    print(f"║ {icon} AUCKLAND TRANSPORT - REAL-TIME DEPARTURES{' ' * 30}║")
-    print(f"║ {location.name:<50} {current_time:>25} ║")
-    print("╠" + "═" * 78 + "╣")
-    print("║ Route │ Destination │ Departs │ In │ Status ║")
-    print("╠" + "═" * 78 + "╣")
+    lines = [
+        BORDER_TOP,
+        f"║ {icon} AUCKLAND TRANSPORT - REAL-TIME DEPARTURES{' ' * 30}║",
+        f"║ {location.name:<50} {current_time:>25} ║",
+        BORDER_MID,
+        COLUMN_HEADER,
+        BORDER_MID,
+    ]
     
     # Departures
     if not departures:
-        print("║" + " " * 25 + "No departures found" + " " * 34 + "║")
+        lines.append(NO_DEPARTURES_ROW)
     else:
         for dep in departures:
-            route = dep['route'][:7]
-            headsign = dep['headsign'][:22]
-            time_str = dep['time'].strftime('%H:%M')
             mins = dep['mins_until']
             
             # Format minutes
-            if mins == 0:
-                mins_str = "NOW"
-            elif mins < 60:
-                mins_str = f"{mins}m"
-            else:
-                hrs = mins // 60
-                m = mins % 60
-                mins_str = f"{hrs}h{m}m"
+            hrs, m = divmod(mins, 60)
+            mins_str = "NOW" if mins == 0 else (f"{m}m" if hrs == 0 else f"{hrs}h{m}m")
             
             # Status with color
             delay_mins = dep['delay'] // 60
@@ -235,25 +393,45 @@ def render_console_board(location: Location, departures: List[Dict]):
                 status = f"{COLOR_YELLOW}{-delay_mins}m EARLY{COLOR_RESET}"
                 marker = "⚡"
             else:
-                status = f"{COLOR_GREEN}ON TIME{COLOR_RESET}"
+                status = STATUS_ONTIME
                 marker = "✓"
             
-            print(f"║ {route:<7}│ {headsign:<22}│ {time_str:<8}│ {mins_str:<5}│ {marker} {status:<10} ║")
+            lines.append(ROW_FMT(route=dep['route'], headsign=dep['headsign'],
+                                 time_str=dep['time'].strftime('%H:%M'), mins_str=mins_str,
+                                 marker=marker, status=status))
     
-    print("╚" + "═" * 78 + "╝")
-    print(f"\nRefreshing in {REFRESH_INTERVAL}s | Rotating boards every {ROTATION_SECONDS}s")
+    lines.append(BORDER_BOTTOM)
+    lines.append(f"\nRefreshing in {REFRESH_INTERVAL}s | Rotating boards every {ROTATION_SECONDS}s")
+    # One write per board instead of one per line
+    print("\n".join(lines))
 # ============================================================================
 # MAIN CONTROL LOOP
 # ============================================================================
-def initialize_locations():
+def check_protobuf_backend():
+    """Warn if protobuf fell back to the slow pure-Python decoder"""
+    # upb (protobuf >= 4.21) and cpp are native; 'python' parses the feed
+    # 5-25x slower, which hurts on a Pi. Don't force 'cpp' via the env var -
+    # modern wheels ship upb only and the import would fail.
+    backend = api_implementation.Type()
+    if backend == 'python':
+        print("⚠️ protobuf is using the pure-Python backend - feed parsing will be slow")
+        print("   Fix: pip install --upgrade --only-binary=:all: protobuf")
+    return backend
+def initialize_locations(locations: List[Location]):
     """Find stop IDs for all locations on startup"""
     print("🚀 INITIALIZING DEPARTURE BOARD SYSTEM...")
     print("=" * 80)
     
-    for location in LOCATIONS:
+    for location in locations:
         print(f"\n📍 Searching for {location.name}...")
-        stop_ids = find_stop_ids(location)
+    
+    # Lookups are pure network waits - run them side by side over the pooled session
+    with ThreadPoolExecutor(max_workers=len(locations)) as pool:
+        results = list(pool.map(find_stop_ids, locations))
+    
+    for location, stop_ids in zip(locations, results):
         location.stop_ids = stop_ids
+        location.stop_ids_set = frozenset(stop_ids)
         
         if not stop_ids:
             print(f"⚠️ WARNING: No stops found for {location.name}")
@@ -263,17 +441,22 @@ def initialize_locations():
     print("\n" + "=" * 80)
     print("✓ INITIALIZATION COMPLETE\n")
     time.sleep(2)
-def main():
-    """Main control loop - rotates through locations"""
+def main(modes: List[TransitMode] = None):
+    """Main control loop - rotates through locations, optionally only those of the given modes"""
+    locations = [loc for loc in LOCATIONS if not modes or loc.mode in modes]
+    if not locations:
+        print("❌ ERROR: No locations configured for the selected modes.")
+        return
     
     if SIMULATION_MODE:
         print("🎭 RUNNING IN SIMULATION MODE (No API key set)")
+    check_protobuf_backend()
     
     # Initialize all locations
-    initialize_locations()
+    initialize_locations(locations)
     
     # Check if any locations were found
-    valid_locations = [loc for loc in LOCATIONS if loc.stop_ids]
+    valid_locations = [loc for loc in locations if loc.stop_ids]
     if not valid_locations:
         print("❌ ERROR: No valid locations found. Check your API key and network connection.")
         return
@@ -282,5 +465,44 @@ def main():
     print(" Press Ctrl+C to exit\n")
     time.sleep(2)
     
-    # Main loop
-    location_index =
\ No newline at end of file
+    # Main loop - one schedule queue drives both ticks so they can't drift apart
+    location_index = 0
+    intervals = {'refresh': REFRESH_INTERVAL, 'rotate': ROTATION_SECONDS}
+    start = time.monotonic()
+    schedule = [(start + interval, event) for event, interval in intervals.items()]
+    heapq.heapify(schedule)
+    try:
+        render_console_board(valid_locations[0], get_departures(valid_locations[0]))
+        while True:
+            due, event = heapq.heappop(schedule)
+            time.sleep(max(0, due - time.monotonic()))
+            fired = [(due, event)]
+            
+            # Refresh and rotate coincide every lcm of the intervals - rotate first and
+            # draw the incoming board once with fresh data instead of redrawing twice
+            # (within a second, as float grid sums may differ by an ulp)
+            if event == 'refresh' and schedule and schedule[0][1] == 'rotate' and schedule[0][0] - due < 1:
+                fired.append(heapq.heappop(schedule))
+            
+            if any(ev == 'rotate' for _, ev in fired):
+                location_index = (location_index + 1) % len(valid_locations)
+            location = valid_locations[location_index]
+            render_console_board(location, get_departures(location, refresh=(event == 'refresh')))
+            
+            # Stay on the fixed grid; if we fell a whole interval behind, skip ahead
+            for ev_due, ev in fired:
+                next_due = ev_due + intervals[ev]
+                if next_due < time.monotonic():
+                    next_due = time.monotonic() + intervals[ev]
+                heapq.heappush(schedule, (next_due, ev))
+    except KeyboardInterrupt:
+        print("\n👋 Board shutting down. Great Scott!")
+def parse_args():
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Auckland Transport real-time departure boards")
+    parser.add_argument('--mode', action='append', choices=[m.value for m in TransitMode],
+                        help="Only show boards for this transit mode (repeatable)")
+    return parser.parse_args()
+if __name__ == "__main__":
+    args = parse_args()
+    main([TransitMode(m) for m in args.mode] if args.mode else None)
@@ -0,0 +1,193 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Partial GTFS-Realtime decoder for the departure boards.
+Walks the protobuf wire format of a tripupdates FeedMessage and pulls out
+only the fields the boards read, skipping everything else by length.
+Build it on the Pi with:  cythonize -i _fast_gtfs.pyx
+ATRTDB.py falls back to gtfs_realtime_pb2 when the compiled module is missing.
+"""
+from libc.stdint cimport uint64_t, int64_t, int32_t
+
+# Field numbers from gtfs-realtime.proto
+cdef enum:
+    FEED_ENTITY = 2            # FeedMessage.entity
+    ENTITY_TRIP_UPDATE = 3     # FeedEntity.trip_update
+    TU_TRIP = 1                # TripUpdate.trip
+    TU_STOP_TIME_UPDATE = 2    # TripUpdate.stop_time_update
+    TU_TRIP_PROPERTIES = 6     # TripUpdate.trip_properties
+    TRIP_ROUTE_ID = 5          # TripDescriptor.route_id
+    PROPS_HEADSIGN = 5         # TripProperties.trip_headsign
+    STU_STOP_ID = 4            # StopTimeUpdate.stop_id
+    STU_DEPARTURE = 3          # StopTimeUpdate.departure
+    EVENT_DELAY = 1            # StopTimeEvent.delay
+    EVENT_TIME = 2             # StopTimeEvent.time
+
+cdef enum:
+    WIRE_VARINT = 0
+    WIRE_FIXED64 = 1
+    WIRE_LEN = 2
+    WIRE_FIXED32 = 5
+
+
+cdef int _read_varint(const unsigned char* buf, Py_ssize_t end,
+                      Py_ssize_t* pos, uint64_t* out) except -1:
+    cdef uint64_t result = 0
+    cdef int shift = 0
+    cdef unsigned char b
+    while True:
+        if pos[0] >= end or shift > 63:
+            raise ValueError("truncated varint in GTFS-RT feed")
+        b = buf[pos[0]]
+        pos[0] += 1
+        result |= <uint64_t>(b & 0x7F) << shift
+        if b < 0x80:
+            out[0] = result
+            return 0
+        shift += 7
+
+
+cdef int _read_len(const unsigned char* buf, Py_ssize_t end,
+                   Py_ssize_t* pos, Py_ssize_t* sub_end) except -1:
+    cdef uint64_t n
+    _read_varint(buf, end, pos, &n)
+    if n > <uint64_t>(end - pos[0]):
+        raise ValueError("truncated message in GTFS-RT feed")
+    sub_end[0] = pos[0] + <Py_ssize_t>n
+    return 0
+
+
+cdef int _skip(const unsigned char* buf, Py_ssize_t end,
+               Py_ssize_t* pos, int wire_type) except -1:
+    cdef uint64_t n
+    cdef Py_ssize_t sub_end
+    if wire_type == WIRE_VARINT:
+        _read_varint(buf, end, pos, &n)
+    elif wire_type == WIRE_LEN:
+        _read_len(buf, end, pos, &sub_end)
+        pos[0] = sub_end
+    elif wire_type == WIRE_FIXED64:
+        pos[0] += 8
+    elif wire_type == WIRE_FIXED32:
+        pos[0] += 4
+    else:
+        raise ValueError(f"unsupported wire type {wire_type} in GTFS-RT feed")
+    if pos[0] > end:
+        raise ValueError("truncated field in GTFS-RT feed")
+    return 0
+
+
+cdef inline str _read_str(const unsigned char* buf, Py_ssize_t end, Py_ssize_t* pos):
+    cdef Py_ssize_t sub_end
+    _read_len(buf, end, pos, &sub_end)
+    s = (<const char*>buf)[pos[0]:sub_end].decode('utf-8')
+    pos[0] = sub_end
+    return s
+
+
+cdef int _parse_entity(const unsigned char* buf, Py_ssize_t pos, Py_ssize_t end,
+                       list trip_updates) except -1:
+    cdef uint64_t key = 0, value = 0
+    cdef int field, wire_type
+    cdef Py_ssize_t tu_end, sub_end, ev_end, p2, p3
+    cdef bint has_trip_update = False, has_departure
+    cdef int64_t dep_time
+    cdef int32_t delay
+    route_id = ''
+    headsign = ''
+    stops = []
+
+    while pos < end:
+        _read_varint(buf, end, &pos, &key)
+        field = <int>(key >> 3)
+        wire_type = <int>(key & 7)
+        if field != ENTITY_TRIP_UPDATE or wire_type != WIRE_LEN:
+            _skip(buf, end, &pos, wire_type)
+            continue
+
+        # A repeated trip_update merges: scalars last-wins, stop lists concatenate
+        has_trip_update = True
+        _read_len(buf, end, &pos, &tu_end)
+        while pos < tu_end:
+            _read_varint(buf, tu_end, &pos, &key)
+            field = <int>(key >> 3)
+            wire_type = <int>(key & 7)
+            if wire_type != WIRE_LEN or field not in (TU_TRIP, TU_STOP_TIME_UPDATE, TU_TRIP_PROPERTIES):
+                _skip(buf, tu_end, &pos, wire_type)
+                continue
+
+            _read_len(buf, tu_end, &pos, &sub_end)
+            p2 = pos
+            pos = sub_end
+            if field == TU_TRIP:
+                while p2 < sub_end:
+                    _read_varint(buf, sub_end, &p2, &key)
+                    if key == ((TRIP_ROUTE_ID << 3) | WIRE_LEN):
+                        route_id = _read_str(buf, sub_end, &p2)
+                    else:
+                        _skip(buf, sub_end, &p2, <int>(key & 7))
+            elif field == TU_TRIP_PROPERTIES:
+                while p2 < sub_end:
+                    _read_varint(buf, sub_end, &p2, &key)
+                    if key == ((PROPS_HEADSIGN << 3) | WIRE_LEN):
+                        headsign = _read_str(buf, sub_end, &p2)
+                    else:
+                        _skip(buf, sub_end, &p2, <int>(key & 7))
+            else:
+                stop_id = ''
+                has_departure = False
+                dep_time = 0
+                delay = 0
+                while p2 < sub_end:
+                    _read_varint(buf, sub_end, &p2, &key)
+                    if key == ((STU_STOP_ID << 3) | WIRE_LEN):
+                        stop_id = _read_str(buf, sub_end, &p2)
+                    elif key == ((STU_DEPARTURE << 3) | WIRE_LEN):
+                        has_departure = True
+                        _read_len(buf, sub_end, &p2, &ev_end)
+                        p3 = p2
+                        p2 = ev_end
+                        while p3 < ev_end:
+                            _read_varint(buf, ev_end, &p3, &key)
+                            if key == ((EVENT_TIME << 3) | WIRE_VARINT):
+                                _read_varint(buf, ev_end, &p3, &value)
+                                dep_time = <int64_t>value
+                            elif key == ((EVENT_DELAY << 3) | WIRE_VARINT):
+                                _read_varint(buf, ev_end, &p3, &value)
+                                delay = <int32_t>value
+                            else:
+                                _skip(buf, ev_end, &p3, <int>(key & 7))
+                    else:
+                        _skip(buf, sub_end, &p2, <int>(key & 7))
+                if has_departure:
+                    stops.append((stop_id, dep_time, delay))
+
+    if has_trip_update:
+        trip_updates.append((route_id, headsign, stops))
+    return 0
+
+
+def parse_tripupdates(const unsigned char[::1] data):
+    """
+    Decode a serialized FeedMessage into a list of
+    (route_id, headsign, [(stop_id, departure_time, delay), ...]) tuples,
+    one per trip_update entity. Only stop_time_updates with a departure are
+    kept; unset strings come back as '' and unset numbers as 0.
+    """
+    cdef Py_ssize_t end = data.shape[0]
+    cdef Py_ssize_t pos = 0, sub_end
+    cdef uint64_t key = 0
+    cdef const unsigned char* buf
+    trip_updates = []
+    if end == 0:
+        return trip_updates
+    buf = &data[0]
+
+    while pos < end:
+        _read_varint(buf, end, &pos, &key)
+        if key == ((FEED_ENTITY << 3) | WIRE_LEN):
+            _read_len(buf, end, &pos, &sub_end)
+            _parse_entity(buf, pos, sub_end, trip_updates)
+            pos = sub_end
+        else:
+            _skip(buf, end, &pos, <int>(key & 7))
+    return trip_updates